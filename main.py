@@ -1,6 +1,7 @@
 """This script is used to excite the toy mimo system,
 and get the response signals.
 """
+import argparse
 import numpy as np
 
 from src.mimo_system import ToyMIMO
@@ -16,15 +17,20 @@ def get_applied_u(u: np.ndarray) -> np.ndarray:
     return 2.0*u
 
 def main(nr_outputs: int,
-         signal_name: str):
+         signal_name: str,
+         sys_name: str=None):
     us, t_stamp = get_data(signal_name)
     us_applied = get_applied_u(us)
 
     nr_inputs = us_applied.shape[0]
     
     sys = ToyMIMO(nr_inputs, nr_outputs)
-    sys.initialization()
-    sys.build_system()
+    if sys_name is None:
+        sys.initialization()
+    else:
+        sys.load_params(sys_name)   # reuse an existing system
+    sys.build_system(t_stamp, use_cache=sys_name is not None)
+    us_applied = us_applied.astype(sys.dtype)
     y = sys.excite_system(us_applied, t_stamp)    
     
     data = {
@@ -39,5 +45,10 @@ def main(nr_outputs: int,
     save_data(data, 'test')
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sys_name', default=None,
+                        help='reuse an existing system in data/systems')
+    args = parser.parse_args()
     main(nr_outputs=2,
-         signal_name='test')
\ No newline at end of file
+         signal_name='test',
+         sys_name=args.sys_name)
\ No newline at end of file
@@ -2,87 +2,264 @@
 """
 import numpy as np
 import scipy.signal as signal
+from scipy.linalg import expm
 import pickle
+import hashlib
 from datetime import datetime
+from typing import Union
+from concurrent.futures import ThreadPoolExecutor
 
 from src.utils import *
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
 np.random.seed(42)
 
+if njit is not None:
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _step_ss(Ad, Bd, Cd, Dd, u, y):
+        """Simulate the discrete state-space model from zero state
+        and write the output into y. The matrix products are spelled
+        out as loops, which are cheaper than BLAS calls for the small
+        matrices here.
+        """
+        n = Ad.shape[0]
+        m, N = u.shape
+        x = np.zeros(n, dtype=Ad.dtype)
+        x_next = np.empty(n, dtype=Ad.dtype)
+        for k in range(N):
+            # accumulate in the arrays to compute in their precision
+            y[k] = 0.0
+            for i in range(n):
+                y[k] += Cd[i]*x[i]
+            for j in range(m):
+                y[k] += Dd[j]*u[j, k]
+
+            for i in range(n):
+                x_next[i] = 0.0
+                for l in range(n):
+                    x_next[i] += Ad[i, l]*x[l]
+                for j in range(m):
+                    x_next[i] += Bd[i, j]*u[j, k]
+            x, x_next = x_next, x
+
+def get_format(a: np.ndarray) -> str:
+    """Format the array.
+
+    Args:
+        a: the given array.
+    
+    Returns:
+        str: the formatted string
+    """
+    a = np.asarray(a)
+    nz = np.flatnonzero(a)  # skip zero coefficients
+    exponents = (len(a) - 1) - nz  # descent
+    coefs = a[nz]
+
+    signs = np.where(coefs < 0, "- ", "+ ")
+    if len(coefs) > 0 and coefs[0] >= 0:
+        signs[0] = ""  # first term, no "+"
+    powers = [f"s^{e}" if e > 1 else "s"*e for e in exponents]  # s^1 = s, s^0 = 1
+
+    return " ".join([f"{sign}{abs(coef):.5f}{power}" 
+                     for sign, coef, power in zip(signs, coefs, powers)])
+
+def time2freq(signal: np.ndarray, 
+              N: int=None) -> complex:
+    """Convert real time signal to frequency signal, only
+    the non-negative frequencies are kept.
+
+    Args:
+        signal (n x N): the signal in the time domain
+        N: the length of the transform, the signal is 
+            zero-padded if it is shorter
+    
+    Returns:
+        Y (n x N//2+1): the singal in the frequency domain
+    """
+    return np.fft.rfft(signal, n=N, axis=1)
+
+def freq2time(SIGNAL: complex, 
+              N: int) -> np.ndarray:
+    """Convert frequency signal to real time signal.
+
+    Args:
+        SIGNAL (n x N//2+1): the signal in the frequency domain
+        N: the length of the signal in the time domain
+
+    Returns:
+        y (n x N): the signal in the time domain
+    """
+    return np.fft.irfft(SIGNAL, n=N, axis=1)
+
 class ToyMIMO():
     """Generate a mimo system. And excite the system
     with designed signals to get reponse signals.
     """
-    def __init__(self, nr_inputs: int, nr_outputs: int) -> None:
+    __slots__ = ('nr_inputs', 'nr_outputs', 'dtype', 'root', 'sys_name',
+                 'order_num', 'order_den', 'num_coeffs', 'den_coeffs',
+                 'dt', 'N', 'A', 'B', 'C', 'D', 'Ad', 'Bd', 'Cd', 'Dd', 'Hf')
+
+    def __init__(self, nr_inputs: int, nr_outputs: int, 
+                 dtype: type=np.float32) -> None:
         """Initialize a instance
         
         Args:
             nr_inputs: the number of inputs of the system
             nr_outputs: the number of outputs of the system
+            dtype: the precision of the excitation, np.float64
+                for validation
         """
         self.nr_inputs = nr_inputs
         self.nr_outputs = nr_outputs
+        self.dtype = np.dtype(dtype)
         self.root = get_parent_path(lvl=1)
     
-    def initialization(self):
+    def initialization(self, order_max: int=3):
         """Initialize the parameters for generating the 
-        transfer functions.
+        transfer functions. The coefficients are stored in
+        descending powers and zero-padded at the front to 
+        the highest possible order, which does not change 
+        the polynomials.
+
+        Args:
+            order_max: the highest order of the numerators
         """
-        self.params = [[None] * self.nr_inputs for _ in range(self.nr_outputs)]
-        for row in range(self.nr_outputs):
-            for col in range(self.nr_inputs):
-                order_num, order_den, num, den = self.get_transfer_function_parameters()
-                self.params[row][col] = {
-                    'order_num': order_num, 
-                    'order_den': order_den,
-                    'num': num,
-                    'den': den
-                }
+        shape = (self.nr_outputs, self.nr_inputs)
+        (self.order_num, self.order_den, 
+         self.num_coeffs, self.den_coeffs) = self.get_transfer_function_parameters(shape, order_max)
 
         self.sys_name = self.get_time()
         self.save_params(self.params, self.sys_name)
-    
-    def build_system(self) -> None:
-        """Build the system.
-        """
-        self.H = self._built_system(self.params)
         self.save_tf(self.params, self.sys_name)
+
+    @property
+    def params(self) -> list:
+        """The parameters of the transfer functions as nested 
+        list of dicts, params[row][col] with the keys 'order_num', 
+        'order_den', 'num' and 'den'.
+        """
+        return [[{
+            'order_num': int(self.order_num[row, col]), 
+            'order_den': int(self.order_den[row, col]),
+            'num': self.num_coeffs[row, col, -(self.order_num[row, col]+1):],
+            'den': self.den_coeffs[row, col, -(self.order_den[row, col]+1):]
+        } for col in range(self.nr_inputs)] for row in range(self.nr_outputs)]
+
+    @params.setter
+    def params(self, params: list) -> None:
+        nr_outputs = len(params)
+        nr_inputs = len(params[0])
+        len_coeffs = max(len(cell[key]) for row in params for cell in row for key in ('num', 'den'))
+        
+        self.order_num = np.zeros((nr_outputs, nr_inputs), dtype=int)
+        self.order_den = np.zeros((nr_outputs, nr_inputs), dtype=int)
+        self.num_coeffs = np.zeros((nr_outputs, nr_inputs, len_coeffs))
+        self.den_coeffs = np.zeros((nr_outputs, nr_inputs, len_coeffs))
+
+        for row in range(nr_outputs):
+            for col in range(nr_inputs):
+                num = params[row][col]['num']
+                den = params[row][col]['den']
+                self.order_num[row, col] = params[row][col]['order_num']
+                self.order_den[row, col] = params[row][col]['order_den']
+                self.num_coeffs[row, col, -len(num):] = num
+                self.den_coeffs[row, col, -len(den):] = den
     
-    @staticmethod
-    def get_format(a: np.ndarray) -> str:
-        """Format the array.
+    def build_system(self, t_stamp: np.ndarray, 
+                     use_cache: bool=False) -> None:
+        """Build the frequency responses of the system for the
+        sampling grid of the given time stamp. The discrete
+        state-space models are only built when they are needed.
 
         Args:
-            a: the given array.
-        
+            t_stamp: time stamp for all signals
+            use_cache: load the frequency responses from the cache 
+                of the system, and cache them if they are missing,
+                which pays off when the system is reused
+        """
+        self.dt = get_sampling_time(t_stamp)
+        self.N = len(t_stamp)
+        self.A = self.B = self.C = self.D = None
+        self.Ad = self.Bd = self.Cd = self.Dd = None
+        if use_cache:
+            Hf = self.get_freq_response(self.num_coeffs, self.den_coeffs, self.N, self.dt)
+        else:
+            Hf = self._get_freq_response(self.num_coeffs, self.den_coeffs, self.N, self.dt)
+        self.Hf = Hf.astype(np.promote_types(self.dtype, np.complex64))
+
+    def build_state_space(self) -> None:
+        """Build the state-space models of the system and 
+        discretize them with the sampling time of the system.
+        """
+        self.A, self.B, self.C, self.D = self._get_state_space(self.num_coeffs, self.den_coeffs)
+        Ad, Bd, Cd, Dd = self._discretize_system(self.A, self.B, self.C, self.D, 
+                                                 self.order_den, self.den_coeffs, self.dt)
+        # the system is built in double precision and only cast for the excitation
+        self.Ad, self.Bd, self.Cd, self.Dd = (M.astype(self.dtype) for M in (Ad, Bd, Cd, Dd))
+
+    def get_freq_response(self, num_coeffs: np.ndarray, 
+                          den_coeffs: np.ndarray, 
+                          N: int, 
+                          dt: float) -> np.ndarray:
+        """Load the frequency responses from the cache of the system,
+        evaluate and cache them if they have not been saved for the
+        given parameters and sampling grid.
+
+        Args:
+            num_coeffs: the numerators of the transfer functions
+            den_coeffs: the denominators of the transfer functions
+            N: the length of the signals
+            dt: the sampling time
+
         Returns:
-            str: the formatted string
+            Hf (nr_outputs x nr_inputs x N+1): the frequency responses
         """
-        terms = []
-        order = len(a) - 1  # the highest order
-
-        for i, coef in enumerate(a):
-            exponent = order - i  # descent
-            if coef == 0:
-                continue  # skip if coefficient is zero
-
-            if exponent == 0:
-                term = f"{abs(coef):.5f}"  # only show the cofficient
-            elif exponent == 1:
-                term = f"{abs(coef):.5f}s"  # s^1 = s
-            else:
-                term = f"{abs(coef):.5f}s^{exponent}"  # s^n
-
-            if coef < 0:
-                terms.append(f"- {term}")  # add "-" symbol
-            else:
-                if terms:  # not the first term, add "+"
-                    terms.append(f"+ {term}")
-                else:
-                    terms.append(term)  # first term, no "+"
-
-        return " ".join(terms)
+        key = self.get_cache_key(num_coeffs, den_coeffs, N, dt)
+        path_file = os.path.join(self.root, 'data', 'systems', self.sys_name, f'Hf_{key}.npy')
+        if os.path.exists(path_file):
+            return np.load(path_file)
+        
+        Hf = self._get_freq_response(num_coeffs, den_coeffs, N, dt)
+        # write to a temporary file first, an interrupted run must not leave a truncated cache
+        path_tmp = f"{path_file}.{os.getpid()}.tmp"
+        with open(path_tmp, 'wb') as file:
+            np.save(file, Hf)
+        os.replace(path_tmp, path_file)
+        return Hf
+
+    @staticmethod
+    def get_cache_key(num_coeffs: np.ndarray, 
+                      den_coeffs: np.ndarray, 
+                      N: int, 
+                      dt: float) -> str:
+        """Get the key of the cached frequency responses, which 
+        identifies the parameters and the sampling grid. The 
+        coefficients are hashed without the zero-padding, whose
+        length depends on how the parameters were created.
+
+        Args:
+            num_coeffs: the numerators of the transfer functions
+            den_coeffs: the denominators of the transfer functions
+            N: the length of the signals
+            dt: the sampling time
 
+        Returns:
+            key: the sha1 hex digest
+        """
+        h = hashlib.sha1()
+        for num, den in zip(num_coeffs.reshape(-1, num_coeffs.shape[-1]), 
+                            den_coeffs.reshape(-1, den_coeffs.shape[-1])):
+            h.update(np.trim_zeros(num, 'f').astype(float).tobytes())
+            h.update(np.trim_zeros(den, 'f').astype(float).tobytes())
+        h.update(str(N).encode())
+        h.update(str(dt).encode())
+        return h.hexdigest()
+    
     def save_tf(self, params: dict, 
                 file_name: str) -> None:
         """Save the transfer functions as .txt file.
@@ -96,8 +273,8 @@ class ToyMIMO():
             for row in range(nr_outputs):
                 for col in range(nr_inputs):
                     
-                    str_num = self.get_format(params[row][col]['num'])
-                    str_den = self.get_format(params[row][col]['den'])
+                    str_num = get_format(params[row][col]['num'])
+                    str_den = get_format(params[row][col]['den'])
 
                     file.write(f"H_{row}{col}(s) = \n")
                     file.write("\n")
@@ -110,136 +287,274 @@ class ToyMIMO():
                     file.write("\n")
 
     @staticmethod
-    def get_num(order: int) -> np.ndarray:
-        """Get the parameters for the numerator.
+    def get_num(order: np.ndarray, 
+                len_coeffs: int) -> np.ndarray:
+        """Get the parameters for the numerators, drawn for
+        all transfer functions at once.
 
         Args:
-            order: the order of the numerator
+            order: the orders of the numerators
+            len_coeffs: the number of (zero-padded) parameters
 
         Returns:
-            array: the parameters of the numerator
+            array: the parameters of the numerators
         """
-        return np.random.uniform(-1, 1, order + 1)
+        num = np.random.uniform(-1, 1, order.shape + (len_coeffs,))
+        mask = np.arange(len_coeffs) >= len_coeffs - 1 - order[..., None]
+        return np.where(mask, num, 0.0)
 
-    def get_den(self, order: int) -> np.ndarray:
-        """Generate the parameters for the denominator and
-        ensure that all poles are negative.
+    def get_den(self, order: np.ndarray, 
+                len_coeffs: int) -> np.ndarray:
+        """Generate the parameters for the denominators and
+        ensure that all poles are negative. The polynomials 
+        are expanded for all transfer functions at once by 
+        multiplying with (s - pole) one pole after another.
 
         Args:
-            order: the order of the denominator
+            order: the orders of the denominators
+            len_coeffs: the number of (zero-padded) parameters
         
         Returns:
-            array: the parameters of the denominator
+            array: the parameters of the denominators
         """
-        poles = -np.random.uniform(0.1, 5.0, order)
-        return np.poly(poles)
-
-    @staticmethod
-    def get_transfer_function(num: np.ndarray, 
-                              den: np.ndarray):
-        """Generate the transfer function.
+        poles = -np.random.uniform(0.1, 5.0, order.shape + (len_coeffs - 1,))
+        den = np.zeros(order.shape + (len_coeffs,))
+        den[..., -1] = 1.0
+        for k in range(len_coeffs - 1):
+            shifted = np.zeros_like(den)
+            shifted[..., :-1] = den[..., 1:]  # multiply with s
+            den = np.where((k < order)[..., None], shifted - poles[..., k, None]*den, den)
+        return den
+
+    def get_transfer_function_parameters(self, shape: tuple, 
+                                         order_max: int=3) -> tuple[np.ndarray, 
+                                                                    np.ndarray, 
+                                                                    np.ndarray, 
+                                                                    np.ndarray]:
+        """Generate the parameters for all transfer functions, which ensure
+        that the generated transfer functions are stable, namely, all poles
+        are negative.
 
         Args:
-            num: the parameters of the numerator
-            den: the parameters of the denominator
-
-        Returns:
-            H: the transfer function
-        """
-        return signal.TransferFunction(num, den)
-
-    def get_transfer_function_parameters(self) -> tuple[int, 
-                                                        int, 
-                                                        np.ndarray, 
-                                                        np.ndarray]:
-        """Generate the parameters for a transfer function, which ensure
-        that the generated transfer function is stable, namely, all poles
-        are negative.
+            shape: the shape (nr_outputs, nr_inputs) of the system
+            order_max: the highest order of the numerator
 
         Returns:
-            order_num: the order of the nominator
-            order_den: the order of the denominator
-            num: parameters of the nominator
-            den: parameters of the denominator
+            order_num: the orders of the nominators
+            order_den: the orders of the denominators
+            num: parameters of the nominators
+            den: parameters of the denominators
         """
-        order_num, order_den = self.get_orders()
-        num = self.get_num(order_num)
-        den = self.get_den(order_den)
+        order_num, order_den = self.get_orders(shape, order_max)
+        num = self.get_num(order_num, order_max+2)
+        den = self.get_den(order_den, order_max+2)
         return order_num, order_den, num, den
         
     @staticmethod
-    def get_random_order(order_min: int, order_max: int) -> int:
-        """Generate a random number in [order_min, order_max].
+    def get_random_order(order_min: Union[int, np.ndarray], 
+                         order_max: int, 
+                         shape: tuple) -> np.ndarray:
+        """Generate random numbers in [order_min, order_max].
 
         Args:
             order_min: the minimum order
             order_max: the maximum order
+            shape: the shape of the output
 
         Returns:
-            order: the random order
+            order: the random orders
         """
-        return np.random.randint(order_min, order_max+1)
+        return np.random.randint(order_min, order_max+1, size=shape)
 
-    def get_orders(self, order_max: int=3) -> tuple[int, int]:
-        """Generate the orders of numerator and denominator,
+    def get_orders(self, shape: tuple, 
+                   order_max: int=3) -> tuple[np.ndarray, np.ndarray]:
+        """Generate the orders of numerators and denominators,
         which ensure the causality.
 
         Args:
+            shape: the shape of the output
             order_max: the highest order
         
         Returns:
-            order_num: the order of the numerator
-            order_den: the order of the denominator
+            order_num: the orders of the numerators
+            order_den: the orders of the denominators
         """
-        order_num = self.get_random_order(1, order_max)  # 1 <= order_num <= order_max
-        order_den = self.get_random_order(order_num, order_max+1)  # order_num <= order_den <= order_max + 1
+        order_num = self.get_random_order(1, order_max, shape)  # 1 <= order_num <= order_max
+        order_den = self.get_random_order(order_num, order_max+1, shape)  # order_num <= order_den <= order_max + 1
         return order_num, order_den
 
-    def _built_system(self, params: dict) -> np.ndarray:
-        """Build the linear system H.
+    @staticmethod
+    def get_state_space(num: np.ndarray, 
+                        den: np.ndarray) -> tuple[np.ndarray, 
+                                                  np.ndarray, 
+                                                  np.ndarray, 
+                                                  np.ndarray]:
+        """Get the state-space model of the transfer function
+        in controllable canonical form.
 
         Args:
-            params: parameters of the transfer functions
-        
+            num: the parameters of the numerator
+            den: the parameters of the denominator
+
         Returns:
-            H: the matrix of the transfer functions
+            A, B, C, D: the matrices of the state-space model
         """
-        nr_outputs = len(params)
-        nr_inputs = len(params[0])
-        H = np.empty((nr_outputs, nr_inputs), dtype=object)
+        return signal.tf2ss(np.trim_zeros(num, 'f'), np.trim_zeros(den, 'f'))
+
+    def _get_state_space(self, num_coeffs: np.ndarray, 
+                         den_coeffs: np.ndarray) -> tuple[np.ndarray, 
+                                                          np.ndarray, 
+                                                          np.ndarray, 
+                                                          np.ndarray]:
+        """Build one state-space model for each output, which 
+        superposes the responses of all inputs. The state matrix 
+        is block-diagonal with the state matrices of the channels, 
+        the j-th column of the input matrix only feeds the states 
+        of the j-th channel. The models are zero-padded to the same 
+        number of states, the padded states are never excited.
+
+        Args:
+            num_coeffs: the numerators of the transfer functions
+            den_coeffs: the denominators of the transfer functions
+
+        Returns:
+            A (nr_outputs x n x n): the state matrices
+            B (nr_outputs x n x nr_inputs): the input matrices
+            C (nr_outputs x n): the output matrices
+            D (nr_outputs x nr_inputs): the feedthrough matrices
+        """
+        nr_outputs, nr_inputs, _ = num_coeffs.shape
+        channels = [[self.get_state_space(num_coeffs[row, col], den_coeffs[row, col]) 
+                     for col in range(nr_inputs)] for row in range(nr_outputs)]
+        n = max(sum(ss[0].shape[0] for ss in channels[row]) for row in range(nr_outputs))
+
+        A = np.zeros((nr_outputs, n, n))
+        B = np.zeros((nr_outputs, n, nr_inputs))
+        C = np.zeros((nr_outputs, n))
+        D = np.zeros((nr_outputs, nr_inputs))
 
         for row in range(nr_outputs):
+            idx = 0
             for col in range(nr_inputs):
-                num = params[row][col]['num']
-                den = params[row][col]['den']
-                H[row, col] = self.get_transfer_function(num, den)
+                _A, _B, _C, _D = channels[row][col]
+                _n = _A.shape[0]
+                A[row, idx:idx+_n, idx:idx+_n] = _A
+                B[row, idx:idx+_n, col] = _B.ravel()
+                C[row, idx:idx+_n] = _C.ravel()
+                D[row, col] = _D.item()
+                idx += _n
+
+        return A, B, C, D
+
+    def _discretize_system(self, A: np.ndarray, 
+                           B: np.ndarray, 
+                           C: np.ndarray, 
+                           D: np.ndarray, 
+                           order_den: np.ndarray,
+                           den_coeffs: np.ndarray,
+                           dt: float) -> tuple[np.ndarray, 
+                                               np.ndarray, 
+                                               np.ndarray, 
+                                               np.ndarray]:
+        """Discretize the state-space models of all outputs 
+        with zero-order hold. The blocks of the channels are 
+        discretized separately, since the exponential of a 
+        block-diagonal matrix is block-diagonal. In controllable 
+        canonical form the state and input matrices of a channel 
+        only depend on its denominator, so channels which share 
+        the denominator also share the discrete blocks. The 
+        augmented matrices [[A, B], [0, 0]]*dt of the distinct 
+        channels with the same order are stacked along a batch 
+        axis, such that one batched matrix exponential per order 
+        discretizes them (van Loan).
+
+        Args:
+            A (nr_outputs x n x n): the state matrices
+            B (nr_outputs x n x nr_inputs): the input matrices
+            C (nr_outputs x n): the output matrices
+            D (nr_outputs x nr_inputs): the feedthrough matrices
+            order_den: the orders of the denominators
+            den_coeffs: the denominators of the transfer functions
+            dt: the sampling time
+
+        Returns:
+            Ad, Bd, Cd, Dd: the discrete matrices with the same shapes
+        """
+        nr_outputs, nr_inputs = order_den.shape
+        blocks = {}  # denominator -> (order, index in the batch of the order)
+        channels = []  # (row, col, first state, denominator) of every channel
+        M = {}  # order -> augmented matrices of the distinct channels
 
-        return H
+        for row in range(nr_outputs):
+            idx = 0
+            for col in range(nr_inputs):
+                n = order_den[row, col]
+                key = den_coeffs[row, col].tobytes()
+                if key not in blocks:
+                    batch = M.setdefault(n, [])
+                    blocks[key] = (n, len(batch))
+                    _M = np.zeros((n + 1, n + 1))
+                    _M[:n, :n] = A[row, idx:idx+n, idx:idx+n]*dt
+                    _M[:n, n] = B[row, idx:idx+n, col]*dt
+                    batch.append(_M)
+                channels.append((row, col, idx, key))
+                idx += n
+
+        E = {n: expm(np.stack(batch)) for n, batch in M.items()}
+
+        Ad, Bd = np.zeros_like(A), np.zeros_like(B)
+        for row, col, idx, key in channels:
+            n, i = blocks[key]
+            Ad[row, idx:idx+n, idx:idx+n] = E[n][i, :n, :n]
+            Bd[row, idx:idx+n, col] = E[n][i, :n, n]
+
+        # zero-order hold does not change the output and feedthrough matrices
+        return Ad, Bd, C.copy(), D.copy()
     
     @staticmethod
-    def time2freq(signal: np.ndarray) -> complex:
-        """Convert time signal to frequency signal.
+    def _get_freq_response(num_coeffs: np.ndarray, 
+                           den_coeffs: np.ndarray, 
+                           N: int, 
+                           dt: float) -> np.ndarray:
+        """Evaluate the frequency responses of all transfer functions
+        on the rfft frequency grid of signals zero-padded to 2N, so 
+        that the multiplication in the frequency domain amounts to a 
+        linear instead of a circular convolution.
 
         Args:
-            signal (n x N): the signal in the time domain
-        
+            num_coeffs: the numerators of the transfer functions
+            den_coeffs: the denominators of the transfer functions
+            N: the length of the signals
+            dt: the sampling time
+
         Returns:
-            Y (n x N): the singal in the frequency domain
+            Hf (nr_outputs x nr_inputs x N+1): the frequency responses
         """
-        return np.fft.fft(signal, axis=1)
+        s = 1j*2*np.pi*np.fft.rfftfreq(2*N, dt)
+        Hf = ToyMIMO.horner(num_coeffs, s)
+        Hf /= ToyMIMO.horner(den_coeffs, s)
+        return Hf
 
     @staticmethod
-    def freq2time(SIGNAL: complex) -> np.ndarray:
-        """Convert frequency signal to time signal.
+    def horner(coeffs: np.ndarray, 
+               s: np.ndarray) -> np.ndarray:
+        """Evaluate all polynomials at all points with Horner's 
+        scheme, updating one contiguous array in place.
 
         Args:
-            SIGNAL (n x N): the signal in the frequency domain
+            coeffs (... x K+1): the coefficients in descending powers
+            s (F,): the points
 
         Returns:
-            y (n x N): the signal in the frequency domain
+            val (... x F): the values of the polynomials
         """
-        return np.fft.ifft(SIGNAL, axis=1).real 
-    
+        val = np.empty(coeffs.shape[:-1] + s.shape, dtype=complex)
+        val[...] = coeffs[..., 0, None]
+        for k in range(1, coeffs.shape[-1]):
+            val *= s
+            val += coeffs[..., k, None]
+        return val
+
     def save_params(self, params: list, 
                     file_name: str) -> None:
         """Save the data of the transfer functions.
@@ -250,6 +565,20 @@ class ToyMIMO():
         with open(path_file, 'wb') as file:
             pickle.dump(params, file)
     
+    def load_params(self, file_name: str) -> None:
+        """Load the data of the transfer functions of
+        an existing system.
+        """
+        path_file = os.path.join(self.root, 'data', 'systems', file_name, 'params')
+        with open(path_file, 'rb') as file:
+            params = pickle.load(file)
+        
+        if (len(params), len(params[0])) != (self.nr_outputs, self.nr_inputs):
+            raise ValueError(f"The system {file_name} does not have {self.nr_outputs} outputs and {self.nr_inputs} inputs.")
+
+        self.params = params
+        self.sys_name = file_name
+
     @staticmethod
     def get_time():
         """Get the current time as file name.
@@ -257,40 +586,93 @@ class ToyMIMO():
         current_time = datetime.now()
         return current_time.strftime("%Y-%m-%d_%H-%M-%S")
 
-    def excite_channel(self, H, 
-                       u: np.ndarray, 
-                       t_stamp: np.ndarray) -> np.ndarray:
-        """
-        """
-        t_out, y_out, _ = signal.lsim(H, U=u, T=t_stamp)
-        return y_out
-
-    def excite_dof(self, H: np.ndarray, 
+    def excite_dof(self, row: int, 
                    u: np.ndarray, 
-                   t_stamp: np.ndarray) -> np.ndarray:
-        """
+                   out: np.ndarray) -> None:
+        """Excite one output of the system with all inputs,
+        starting from zero state.
+
+        Args:
+            row: the index of the output
+            u (nr_inputs x N): the input signals
+            out (N,): the array to write the response of the output into
         """
-        m, N = u.shape
-        y = np.zeros((N,))
-        for i in range(m):
-            y += self.excite_channel(H[i], u[i, :], t_stamp)
-        return y
+        Ad, Bd, Cd, Dd = self.Ad[row], self.Bd[row], self.Cd[row], self.Dd[row]
+        if njit is None:
+            _, y, _ = signal.dlsim((Ad, Bd, Cd[None, :], Dd[None, :], self.dt), u.T)
+            out[:] = y[:, 0]
+        else:
+            _step_ss(Ad, Bd, Cd, Dd, u, out)
     
     def excite_system(self, u: np.ndarray, 
-                      t_stamp: np.ndarray) -> np.ndarray:
+                      t_stamp: np.ndarray,
+                      method: str='ss') -> np.ndarray:
         """Excite the system with designed time signals u.
 
         Args:
             u (nr_inputs x N): the designed input signals
             t_stamp: time stamp for all signals
+            method: 'ss' to simulate the discrete state-space 
+                models with zero-order hold (exact), 'fft' to 
+                filter all channels at once in the frequency 
+                domain, which is faster but only approximates 
+                the response, see _excite_system_fft
         
+        Returns:
+            y (nr_outpus x N): response signals
+        """
+        if not np.isclose(get_sampling_time(t_stamp), self.dt):
+            raise ValueError("The sampling time differs from the one of the built system.")
+
+        if method == 'fft':
+            return self._excite_system_fft(u)
+        elif method == 'ss':
+            return self._excite_system_ss(u)
+        else:
+            raise ValueError(f"Unknown method: {method}")
+
+    def _excite_system_fft(self, u: np.ndarray) -> np.ndarray:
+        """Excite the system in the frequency domain, 
+        Y_i = sum_j H_ij U_j for all outputs at once. The 
+        continuous frequency responses are applied to the
+        sampled signals, so the result deviates from the
+        simulation, mostly by Gibbs ringing where the signals
+        jump, e.g. at the start. For the test signal the error
+        is about 1e-2 of a peak of 2.1, for a unit step 2e-2.
+
+        Args:
+            u (nr_inputs x N): the input signals
+
         Returns:
             y (nr_outpus x N): response signals
         """
         _, N = u.shape
-        y = np.zeros((self.nr_outputs, N))
+        if N != self.N:
+            raise ValueError("The length of the signals differs from the one of the built system.")
+        
+        U = time2freq(u.astype(self.dtype, copy=False), 2*N)
+        Y = np.einsum('oif,if->of', self.Hf, U)
+        return freq2time(Y, 2*N)[:, :N]
 
-        for i in range(self.nr_outputs):
-            y[i, :] = self.excite_dof(self.H[i, :], u, t_stamp)
+    def _excite_system_ss(self, u: np.ndarray) -> np.ndarray:
+        """Excite the system by simulating the discrete 
+        state-space model of each output. The outputs are
+        independent and simulated in parallel threads.
 
+        Args:
+            u (nr_inputs x N): the input signals
+
+        Returns:
+            y (nr_outpus x N): response signals
+        """
+        if self.Ad is None:
+            self.build_state_space()
+
+        _, N = u.shape
+        u = u.astype(self.dtype, copy=False)
+        y = np.empty((self.nr_outputs, N), dtype=self.dtype)
+        with ThreadPoolExecutor() as executor:
+            # consume the iterator to wait for all outputs
+            list(executor.map(lambda i: self.excite_dof(i, u, y[i, :]), 
+                              range(self.nr_outputs)))
         return y
@@ -1,8 +1,11 @@
 """Collection of useful functions.
 """
 import os
+import functools
 from pathlib import Path
 import pickle
+import json
+import numpy as np
 
 def mkdir(path: Path) -> None:
     """Check if the folder exists and create it
@@ -12,10 +15,12 @@ def mkdir(path: Path) -> None:
     if not folder:
         os.makedirs(path)
 
+@functools.lru_cache(maxsize=8)
 def get_parent_path(lvl: int=0) -> Path:
     """Get the lvl-th parent path as root path.
     Return current file path when lvl is zero.
-    Must be called under the same folder.
+    Must be called under the same folder. The result
+    is cached since __file__ does not change.
     """
     path = os.path.dirname(os.path.abspath(__file__))
     if lvl > 0:
@@ -23,11 +28,56 @@ def get_parent_path(lvl: int=0) -> Path:
             path = os.path.abspath(os.path.join(path, os.pardir))
     return path
 
+def to_json(value):
+    """Convert numpy scalars, which are not json serializable.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def load_npy(path_folder: str) -> dict:
+    """Load the arrays from the .npy files in the folder as 
+    read-only memory maps, so only the parts which are used
+    are read from disk, and the other values from data.json.
+    """
+    data = {}
+    for file_name in sorted(os.listdir(path_folder)):
+        key, ext = os.path.splitext(file_name)
+        if ext == '.npy':
+            data[key] = np.load(os.path.join(path_folder, file_name), mmap_mode='r')
+    with open(os.path.join(path_folder, 'data.json'), 'r') as file:
+        data.update(json.load(file))
+    return data
+
+def save_npy(data: dict, 
+             path_folder: str) -> None:
+    """Save each array as .npy file in the folder and
+    the other values to data.json. Tuples are stored 
+    as json arrays and are loaded as lists. Arrays of
+    a previous save into the folder are removed.
+    """
+    mkdir(path_folder)
+    for file_name in os.listdir(path_folder):
+        if file_name.endswith('.npy'):
+            os.remove(os.path.join(path_folder, file_name))
+    others = {}
+    for key, value in data.items():
+        if isinstance(value, np.ndarray):
+            np.save(os.path.join(path_folder, key + '.npy'), value)
+        else:
+            others[key] = value
+    with open(os.path.join(path_folder, 'data.json'), 'w') as file:
+        json.dump(others, file, default=to_json)
+
 def load_file(file_nmae: str) -> dict:
-    """Load data from file.
+    """Load data from file. Files saved by older
+    versions are pickled.
     """
     root = get_parent_path(lvl=1)
     path_file = os.path.join(root, 'data', 'excitation_signals', file_nmae)
+    if os.path.isdir(path_file):
+        return load_npy(path_file)
+    
     with open(path_file, 'rb') as file:
         data = pickle.load(file)
     return data
@@ -37,7 +87,14 @@ def save_data(data: dict,
     """Save the data.
     """ 
     root = get_parent_path(lvl=1)
-    path_file = os.path.join(root, 'data', 'response_signals', file_name)
-    with open(path_file, 'wb') as file:
-        pickle.dump(data, file)
+    path_folder = os.path.join(root, 'data', 'response_signals', file_name)
+    save_npy(data, path_folder)
 
+def get_sampling_time(t_stamp: np.ndarray) -> float:
+    """Get the sampling time of the uniform time stamp.
+    Raise an error if the time stamp is not uniform.
+    """
+    dt = t_stamp[1] - t_stamp[0]
+    if not np.allclose(np.diff(t_stamp), dt):
+        raise ValueError("The time stamp must be uniformly sampled.")
+    return dt
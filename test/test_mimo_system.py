@@ -0,0 +1,136 @@
+"""Regression checks for the toy mimo system, run with
+python test/test_mimo_system.py from the root folder.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import scipy.signal as signal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.mimo_system import ToyMIMO, get_format
+from src.utils import load_file
+
+# 1️⃣ Load the committed system and excitation signals
+sys_name = '2025-03-07_22-12-08'
+data = load_file('test')
+u = 2.0*np.asarray(data['us'])
+t_stamp = np.asarray(data['t_stamps'])
+
+# 2️⃣ Reference: zero-order hold simulation of every channel with lsim
+mimo = ToyMIMO(u.shape[0], 2, dtype=np.float64)
+mimo.load_params(sys_name)
+y_ref = np.zeros((mimo.nr_outputs, u.shape[1]))
+for row in range(mimo.nr_outputs):
+    for col in range(mimo.nr_inputs):
+        cell = mimo.params[row][col]
+        _, y_out, _ = signal.lsim((cell['num'], cell['den']), U=u[col], T=t_stamp, interp=False)
+        y_ref[row] += y_out
+
+# 3️⃣ State-space excitation (chunk0-1, chunk0-2, chunk0-8, chunk0-20):
+# exact zero-order hold, must match the reference
+mimo.build_system(t_stamp)
+y = mimo.excite_system(u, t_stamp, method='ss')
+print("float64 max error:", np.abs(y - y_ref).max())
+assert np.abs(y - y_ref).max() < 1e-10
+
+# the default precision is float32 (chunk0-19)
+mimo = ToyMIMO(u.shape[0], 2)
+mimo.load_params(sys_name)
+mimo.build_system(t_stamp)
+y = mimo.excite_system(u, t_stamp, method='ss')
+print("float32 max error:", np.abs(y - y_ref).max())
+assert y.dtype == np.float32
+assert np.abs(y - y_ref).max() < 1e-5
+
+# 4️⃣ FFT excitation (chunk0-3): approximates the interpolated lsim response
+y_lsim = np.zeros((mimo.nr_outputs, u.shape[1]))
+for row in range(mimo.nr_outputs):
+    for col in range(mimo.nr_inputs):
+        cell = mimo.params[row][col]
+        _, y_out, _ = signal.lsim((cell['num'], cell['den']), U=u[col], T=t_stamp)
+        y_lsim[row] += y_out
+
+mimo = ToyMIMO(u.shape[0], 2, dtype=np.float64)
+mimo.load_params(sys_name)
+mimo.build_system(t_stamp)
+y = mimo.excite_system(u, t_stamp, method='fft')
+print("fft max error:", np.abs(y - y_lsim).max())
+assert np.abs(y - y_lsim).max() < 2e-2
+
+# the zero-padding to 2N avoids that the response to the end of
+# the signals wraps around to the start (about 0.17 without)
+N = u.shape[1]
+u_end = np.zeros_like(u)
+u_end[:, -N//10:] = u[:, -N//10:]
+y = mimo.excite_system(u_end, t_stamp, method='fft')
+print("fft wrap-around:", np.abs(y[:, :N//2]).max())
+assert np.abs(y[:, :N//2]).max() < 1e-5
+
+# 5️⃣ Random parameters (chunk0-13): orders, padding and stable poles
+order_max = 3
+order_num, order_den, num, den = mimo.get_transfer_function_parameters((4, 5), order_max)
+assert num.shape == den.shape == (4, 5, order_max+2)
+assert np.all((1 <= order_num) & (order_num <= order_den) & (order_den <= order_max+1))
+for row in range(4):
+    for col in range(5):
+        n_num, n_den = order_num[row, col], order_den[row, col]
+        assert np.all(num[row, col, :-(n_num+1)] == 0) and num[row, col, -(n_num+1)] != 0
+        assert np.all(den[row, col, :-(n_den+1)] == 0) and den[row, col, -(n_den+1)] == 1
+        poles = np.roots(den[row, col, -(n_den+1):])
+        assert len(poles) == n_den
+        assert np.all(poles.real < 0)
+print("random parameters: ok")
+
+# 6️⃣ Parameters (chunk0-12): round trip through load_params, and the
+# cache key does not depend on the zero-padding of the coefficients
+root = tempfile.mkdtemp()
+mimo = ToyMIMO(3, 2)
+mimo.root = root
+mimo.initialization()
+loaded = ToyMIMO(3, 2)
+loaded.root = root
+loaded.load_params(mimo.sys_name)
+for cell, cell_loaded in zip(sum(mimo.params, []), sum(loaded.params, [])):
+    assert cell['order_num'] == cell_loaded['order_num'] and cell['order_den'] == cell_loaded['order_den']
+    assert np.array_equal(cell['num'], cell_loaded['num']) and np.array_equal(cell['den'], cell_loaded['den'])
+
+key = mimo.get_cache_key(mimo.num_coeffs, mimo.den_coeffs, 1000, 0.01)
+padding = ((0, 0), (0, 0), (2, 0))
+assert key == mimo.get_cache_key(np.pad(mimo.num_coeffs, padding), np.pad(mimo.den_coeffs, padding), 1000, 0.01)
+assert key == loaded.get_cache_key(loaded.num_coeffs, loaded.den_coeffs, 1000, 0.01)
+assert key != mimo.get_cache_key(mimo.num_coeffs, mimo.den_coeffs, 1001, 0.01)
+print("parameters: ok")
+
+# 7️⃣ Cache of the frequency responses (chunk0-4): only written on request,
+# hit on the next build, missed for another sampling grid
+path_system = os.path.join(root, 'data', 'systems', mimo.sys_name)
+list_cache = lambda: sorted(f for f in os.listdir(path_system) if f.startswith('Hf_'))
+t_short = t_stamp[:1000]
+mimo.build_system(t_short)
+assert list_cache() == []
+loaded.build_system(t_short, use_cache=True)
+assert len(list_cache()) == 1 and list_cache()[0].endswith('.npy')  # no temporary file is left
+
+path_cache = os.path.join(path_system, list_cache()[0])
+Hf = np.load(path_cache)
+np.save(path_cache, np.zeros_like(Hf))  # a hit returns the file content
+loaded.build_system(t_short, use_cache=True)
+assert np.all(loaded.Hf == 0)
+mimo.build_system(t_stamp[:2000], use_cache=True)
+assert len(list_cache()) == 2
+shutil.rmtree(root)
+print("cache: ok")
+
+# 8️⃣ Format of the polynomials in transfer_function.txt (chunk0-6)
+cases = [
+    (np.array([0.90142861, 0.46398788, 0.19731697, -0.68796272]), "0.90143s^3 + 0.46399s^2 + 0.19732s - 0.68796"),
+    (np.array([-0.5, 0.0, 2.0, -3.0]), "- 0.50000s^3 + 2.00000s - 3.00000"),
+    (np.array([0.0, 1.5, 0.0]), "1.50000s"),
+    (np.array([0.0, 0.0, 1.0]), "1.00000"),
+    (np.zeros(3), ""),
+]
+for a, expected in cases:
+    assert get_format(a) == expected, (get_format(a), expected)
+print("get_format: ok")
@@ -0,0 +1,40 @@
+"""Checks for the data files, run with
+python test/test_utils.py from the root folder.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import load_npy, save_npy
+
+# 1️⃣ Round trip of save_npy/load_npy (chunk0-16)
+path_folder = os.path.join(tempfile.mkdtemp(), 'signal')
+data = {
+    'us': np.random.randn(3, 100),
+    'N': 100,
+    'mode': 'orthogonal',
+    'idx': (np.int64(0), np.int64(40)),
+}
+save_npy(data, path_folder)
+loaded = load_npy(path_folder)
+assert isinstance(loaded['us'], np.memmap) and np.array_equal(loaded['us'], data['us'])
+assert loaded['N'] == 100 and loaded['mode'] == 'orthogonal'
+assert loaded['idx'] == [0, 40]  # tuples are loaded as lists
+
+# 2️⃣ Arrays of a previous save do not come back
+save_npy({'y': np.zeros(10)}, path_folder)
+loaded = load_npy(path_folder)
+assert sorted(loaded) == ['y']
+
+# 3️⃣ Only numpy scalars are converted for json
+try:
+    save_npy({'x': object()}, path_folder)
+    raise AssertionError("expected TypeError")
+except TypeError:
+    pass
+
+shutil.rmtree(os.path.dirname(path_folder))
+print("save_npy/load_npy: ok")